@@ -9,81 +9,417 @@ Features:
 - Add multiple tags (like kitchen, tools, winter gear)
 - Generate QR codes for boxes
 - Edit boxes and items
+
+Development:  python app.py
+Production:   gunicorn -c gunicorn.conf.py app:app
 """
 
 import os
+import atexit
+import glob
+import hashlib
+import json
+import queue
+import socket
 import sqlite3
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import lru_cache
 import qrcode
-from flask import Flask, render_template, request, redirect, url_for, flash
+from qrcode.exceptions import DataOverflowError
+from qrcode.image.pil import PilImage
+from flask import Flask, render_template, request, redirect, url_for, flash, abort
+from pydantic import BaseModel, Field, ValidationError
 from dotenv import load_dotenv
 
 # --- Flask setup ---
-load_dotenv()
+if os.getenv("FLASK_ENV") != "production":
+    load_dotenv()
 app = Flask(__name__)
 app.secret_key = os.getenv("FLASK_SECRET_KEY", "unsafe_dev_key")
 
 DB = "storage.db"
+DB_POOL_SIZE = 8
 QR_DIR = "static/qr"
-os.makedirs(QR_DIR, exist_ok=True)
+
+def _local_ip():
+    """This machine's LAN address (no packet is sent), or localhost"""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.connect(("10.255.255.255", 1))
+            return sock.getsockname()[0]
+    except OSError:
+        return "localhost"
+
+# Host encoded in QR codes; fixed so visitors' Host headers never pick file names
+QR_HOST = os.getenv("QR_HOST") or _local_ip()
+
+# QR rendering is slow, so it runs off the request path
+qr_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="qr")
+
+# --- SQL statements ---
+# Hot statements are kept as constant strings so every request hits the
+# connection's prepared-statement cache instead of re-compiling the SQL.
+_BOX_SELECT = """
+    SELECT b.id, b.box_name, b.description, b.duration,
+           (SELECT group_concat(t.name, ',')
+            FROM box_tags bt JOIN tags t ON t.id = bt.tag_id
+            WHERE bt.box_id = b.id) AS tags
+    FROM boxes b
+"""
+SQL = {
+    "list_boxes": _BOX_SELECT,
+    "get_box": _BOX_SELECT + " WHERE b.id=?",
+    "add_box": "INSERT INTO boxes (box_name, description, duration) VALUES (?, ?, ?)",
+    "update_box": "UPDATE boxes SET box_name=?, description=?, duration=? WHERE id=?",
+    "delete_box": "DELETE FROM boxes WHERE id=?",
+    "box_ids": "SELECT id FROM boxes",
+    # Box plus its items aggregated by SQLite in a single statement
+    "get_box_with_items": """
+        SELECT b.id, b.box_name, b.description, b.duration,
+               (SELECT group_concat(t.name, ',')
+                FROM box_tags bt JOIN tags t ON t.id = bt.tag_id
+                WHERE bt.box_id = b.id) AS tags,
+               (SELECT json_group_array(json_object(
+                    'id', i.id, 'item_name', i.item_name,
+                    'quantity', i.quantity, 'notes', i.notes))
+                FROM (SELECT id, item_name, quantity, notes FROM items
+                      WHERE box_id = b.id ORDER BY id) i) AS items_json
+        FROM boxes b WHERE b.id=?
+    """,
+    "get_item": "SELECT id, box_id, item_name, quantity, notes FROM items WHERE id=?",
+    "add_item": "INSERT INTO items (box_id, item_name, quantity, notes) VALUES (?, ?, ?, ?)",
+    "update_item": "UPDATE items SET item_name=?, quantity=?, notes=? WHERE id=?",
+    "delete_item": "DELETE FROM items WHERE id=?",
+    "clear_box_tags": "DELETE FROM box_tags WHERE box_id=?",
+    "add_tag": "INSERT OR IGNORE INTO tags (name) VALUES (?)",
+    "add_box_tag": "INSERT OR IGNORE INTO box_tags (box_id, tag_id) SELECT ?, id FROM tags WHERE name=?",
+    "revision": "SELECT value FROM revision",
+}
 
 # --- Database setup ---
-def init_db():
-    """Create the database schema"""
-    conn = sqlite3.connect(DB)
-    c = conn.cursor()
+# The whole schema is created in one transaction, so a fresh database costs a
+# single commit instead of one per statement.
+SCHEMA_SQL = """
+BEGIN IMMEDIATE;
 
-    # Drop old tables if you want a clean rebuild
-    c.execute("DROP TABLE IF EXISTS items;")
-    c.execute("DROP TABLE IF EXISTS boxes;")
+CREATE TABLE IF NOT EXISTS boxes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    box_name TEXT NOT NULL,
+    description TEXT,
+    duration TEXT CHECK(duration IN ('long-term', 'short-term', 'seasonal'))
+);
 
-    # New schema
-    c.execute("""
-        CREATE TABLE boxes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            box_name TEXT NOT NULL,
-            description TEXT,
-            duration TEXT CHECK(duration IN ('long-term', 'short-term', 'seasonal')),
-            tags TEXT
-        )
-    """)
+-- Tags are normalized so they can be indexed and filtered on
+CREATE TABLE IF NOT EXISTS tags (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS box_tags (
+    box_id INTEGER NOT NULL REFERENCES boxes(id) ON DELETE CASCADE,
+    tag_id INTEGER NOT NULL REFERENCES tags(id),
+    PRIMARY KEY (box_id, tag_id)
+) WITHOUT ROWID;
+
+-- Boxes by tag, for tag filtering
+CREATE INDEX IF NOT EXISTS idx_box_tags_tag_id ON box_tags (tag_id, box_id);
+
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    box_id INTEGER NOT NULL,
+    item_name TEXT NOT NULL,
+    quantity INTEGER DEFAULT 1,
+    notes TEXT,
+    FOREIGN KEY (box_id) REFERENCES boxes(id) ON DELETE CASCADE
+);
 
-    c.execute("""
-        CREATE TABLE items (
+-- Covering index: view_box is served from the index alone (id is the rowid)
+CREATE INDEX IF NOT EXISTS idx_items_box_id
+    ON items (box_id, item_name, quantity, notes);
+
+-- Single-row counter bumped by triggers on every write; read caches
+-- key on it so they stay valid across gunicorn worker processes.
+CREATE TABLE IF NOT EXISTS revision (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO revision (id, value) VALUES (0, 0);
+""" + "".join(
+    f"""
+CREATE TRIGGER IF NOT EXISTS bump_revision_{table}_{event.lower()}
+    AFTER {event} ON {table}
+    BEGIN
+        UPDATE revision SET value = value + 1;
+    END;
+"""
+    for table in ("boxes", "items", "box_tags")
+    for event in ("INSERT", "UPDATE", "DELETE")
+) + """
+COMMIT;
+"""
+
+def init_db():
+    """Create the database schema if it does not exist yet"""
+    with get_db() as conn:
+        _enable_wal(conn)  # persistent, so pooled connections don't repeat it
+        conn.executescript(SCHEMA_SQL)
+        migrated = _migrate_box_tags(conn)
+        migrated |= _migrate_items_cascade(conn)
+        if migrated:
+            # Rebuilt tables lose their indexes and triggers
+            conn.executescript(SCHEMA_SQL)
+    print("✅ Database initialized.")
+
+def _migrate_items_cascade(conn):
+    """Rebuild an older items table so its foreign key cascades on delete"""
+    # Check under the write lock so concurrent workers rebuild only once
+    conn.execute("BEGIN IMMEDIATE")
+    fks = conn.execute("PRAGMA foreign_key_list(items)").fetchall()
+    if all(fk.on_delete == "CASCADE" for fk in fks):
+        conn.execute("COMMIT")
+        return False
+    # Separate statements: executescript() would commit the open transaction
+    conn.execute("""
+        CREATE TABLE items_new (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             box_id INTEGER NOT NULL,
             item_name TEXT NOT NULL,
             quantity INTEGER DEFAULT 1,
             notes TEXT,
-            FOREIGN KEY (box_id) REFERENCES boxes(id)
+            FOREIGN KEY (box_id) REFERENCES boxes(id) ON DELETE CASCADE
         )
     """)
+    conn.execute("""
+        INSERT INTO items_new (id, box_id, item_name, quantity, notes)
+            SELECT id, box_id, item_name, quantity, notes FROM items
+            WHERE box_id IN (SELECT id FROM boxes)
+    """)
+    conn.execute("DROP TABLE items")
+    conn.execute("ALTER TABLE items_new RENAME TO items")
+    conn.execute("COMMIT")
+    return True
 
-    conn.commit()
-    conn.close()
-    print("✅ Database initialized with new schema.")
+def _migrate_box_tags(conn):
+    """Move tags out of an older boxes.tags TEXT column into box_tags"""
+    # Check under the write lock so concurrent workers migrate only once
+    conn.execute("BEGIN IMMEDIATE")
+    columns = [col.name for col in conn.execute("PRAGMA table_info(boxes)")]
+    if "tags" not in columns:
+        conn.execute("COMMIT")
+        return False
+    for box in conn.execute("SELECT id, tags FROM boxes WHERE tags != ''").fetchall():
+        set_box_tags(conn, box.id, box.tags.split(","))
+    conn.execute("ALTER TABLE boxes DROP COLUMN tags")
+    conn.execute("COMMIT")
+    return True
 
-def get_db():
-    conn = sqlite3.connect(DB)
-    conn.row_factory = sqlite3.Row  # <-- enables dict-like access
+def set_box_tags(conn, box_id, tags):
+    """Replace the tags on a box"""
+    tags = [(tag.strip(),) for tag in tags if tag.strip()]
+    conn.execute(SQL["clear_box_tags"], (box_id,))
+    conn.executemany(SQL["add_tag"], tags)
+    conn.executemany(SQL["add_box_tag"], [(box_id, name) for (name,) in tags])
+
+# --- Connection pool ---
+# Connections are opened lazily and kept around between requests, so each
+# request skips the open of the db/-wal/-shm files and keeps a warm page cache.
+# The database deliberately stays on disk rather than in a shared-cache
+# ":memory:" copy: that copy would be private to each gunicorn worker, and
+# shared-cache table locks fail with SQLITE_LOCKED instead of waiting. The mmap
+# and page cache below plus the read caches keep reads off the disk anyway.
+_db_pool = queue.Queue(maxsize=DB_POOL_SIZE)
+
+@lru_cache
+def _row_cls(description):
+    """One namedtuple class per distinct result shape, not per row"""
+    return namedtuple("Row", (col[0] for col in description), rename=True)
+
+def nt_factory(cursor, row):
+    """Row factory giving O(1) attribute access (row.box_name)"""
+    return _row_cls(cursor.description)(*row)
+
+def _enable_wal(conn, attempts=50):
+    """Switch the database file to WAL so readers don't block on writers"""
+    for _ in range(attempts - 1):
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            return
+        except sqlite3.OperationalError:
+            # The switch takes an exclusive lock without honouring the busy
+            # timeout, so it fails outright while anything else holds a lock.
+            time.sleep(0.1)
+    conn.execute("PRAGMA journal_mode=WAL")
+
+def _connect():
+    """Open a long-lived connection in autocommit mode"""
+    conn = sqlite3.connect(
+        DB, check_same_thread=False, isolation_level=None, cached_statements=256
+    )
+    conn.row_factory = nt_factory
+    # Issued once per pooled connection, not per request; WAL is set by init_db()
+    conn.execute("PRAGMA synchronous=NORMAL")  # fsync at checkpoints, not every commit
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+    conn.execute("PRAGMA cache_size=-20000")  # ~20 MB page cache
+    conn.execute("PRAGMA foreign_keys=ON")
     return conn
 
+@contextmanager
+def get_db():
+    """Borrow a pooled connection for the duration of a with-block"""
+    try:
+        conn = _db_pool.get_nowait()
+    except queue.Empty:
+        conn = _connect()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            _db_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+@atexit.register
+def close_db_pool():
+    """Close every idle pooled connection"""
+    while True:
+        try:
+            _db_pool.get_nowait().close()
+        except queue.Empty:
+            break
+
+
+# --- Read caches ---
+_boxes_cache = {"revision": None, "boxes": None}
+_boxes_cache_lock = threading.Lock()
+
+def get_revision():
+    """Current value of the write counter maintained by the revision triggers"""
+    with get_db() as conn:
+        return conn.execute(SQL["revision"]).fetchone()[0]
+
+@lru_cache(maxsize=256)
+def load_box(box_id, revision):
+    """Fetch a box and its items; cached until the next write"""
+    with get_db() as conn:
+        box = conn.execute(SQL["get_box_with_items"], (box_id,)).fetchone()
+    items = json.loads(box.items_json) if box else []
+    return box, items
 
 # --- QR code generator ---
+# Box URLs only differ by host and id, so a fixed version and mask pattern
+# skip qrcode's best_fit and best_mask_pattern searches (most of the render time).
+QR_OPTIONS = dict(
+    version=3,
+    error_correction=qrcode.constants.ERROR_CORRECT_L,
+    box_size=6,
+    border=2,
+    mask_pattern=0,
+    image_factory=PilImage,  # Pillow writes PNGs much faster than PyPNG
+)
+_qr_local = threading.local()
+
+def _get_qr():
+    """Return this thread's reusable QRCode object"""
+    qr = getattr(_qr_local, "qr", None)
+    if qr is None:
+        qr = _qr_local.qr = qrcode.QRCode(**QR_OPTIONS)
+    return qr
+
+def qr_url(box_id, ip_address="localhost"):
+    """URL encoded in a box's QR code"""
+    return f"http://{ip_address}:5000/box/{box_id}"
+
+def qr_filename(box_id, ip_address="localhost"):
+    """PNG name keyed by the encoded URL, so a host change gets a new file"""
+    digest = hashlib.blake2b(qr_url(box_id, ip_address).encode(), digest_size=6).hexdigest()
+    return f"box_{box_id}_{digest}.png"
+
 def generate_qr(box_id, ip_address="localhost"):
-    """Generate QR code for a specific box"""
-    url = f"http://{ip_address}:5000/box/{box_id}"
-    qr_path = os.path.join(QR_DIR, f"box_{box_id}.png")
-    qrcode.make(url).save(qr_path)
+    """Generate QR code for a specific box, unless it already exists"""
+    url = qr_url(box_id, ip_address)
+    qr_path = os.path.join(QR_DIR, qr_filename(box_id, ip_address))
+    if os.path.exists(qr_path):
+        return qr_path
+
+    qr = _get_qr()
+    qr.clear()
+    qr.add_data(url)
+    try:
+        qr.make(fit=False)
+    except DataOverflowError:
+        # Long hostname: let qrcode pick a bigger version for this one
+        qr = qrcode.QRCode(**{**QR_OPTIONS, "version": None})
+        qr.add_data(url)
+        qr.make(fit=True)
+
+    # Write to a temp file and swap it in so a half-written PNG is never served
+    with tempfile.NamedTemporaryFile(dir=QR_DIR, suffix=".tmp", delete=False) as tmp:
+        try:
+            qr.make_image().save(tmp, format="PNG", optimize=False, compress_level=1)
+        except BaseException:
+            os.unlink(tmp.name)
+            raise
+    os.chmod(tmp.name, 0o644)  # NamedTemporaryFile is 0600; static servers need to read it
+    os.replace(tmp.name, qr_path)
+
+    # Drop codes rendered for a previous host
+    for old_path in glob.glob(os.path.join(QR_DIR, f"box_{box_id}_*.png")):
+        if old_path != qr_path:
+            try:
+                os.remove(old_path)
+            except FileNotFoundError:
+                pass
     return qr_path
 
+def _log_qr_failure(future):
+    """Surface exceptions from background renders instead of dropping them"""
+    error = future.exception()
+    if error is not None:
+        app.logger.error("QR render failed", exc_info=error)
+
+def submit_qr(box_id):
+    """Render a box's QR code on the background executor"""
+    qr_executor.submit(generate_qr, box_id, QR_HOST).add_done_callback(_log_qr_failure)
+
+@app.template_global()
+def qr_image(box_id):
+    """Static path of a box's QR code"""
+    return "qr/" + qr_filename(box_id, QR_HOST)
+
+# --- Forms ---
+class ItemForm(BaseModel):
+    """Item fields posted by the add/edit item forms"""
+    item_name: str = Field(min_length=1)
+    quantity: int = Field(default=1, ge=1)
+    notes: str = ""
+
+def parse_item_form():
+    """Validate the posted item form in one pass; bad input is a 400, not a 500"""
+    try:
+        return ItemForm.model_validate(request.form)
+    except ValidationError:
+        abort(400)
+
 # --- Routes ---
 
 @app.route("/")
 def list_boxes():
     """List all boxes"""
-    conn = get_db()
-    boxes = conn.execute("SELECT id, box_name, description, duration, tags FROM boxes").fetchall()
-    conn.close()
+    revision = get_revision()
+    with _boxes_cache_lock:
+        if _boxes_cache["revision"] != revision:
+            with get_db() as conn:
+                _boxes_cache["boxes"] = conn.execute(SQL["list_boxes"]).fetchall()
+            _boxes_cache["revision"] = revision
+        boxes = _boxes_cache["boxes"]
     return render_template("boxes.html", boxes=boxes)
 
 @app.route("/add_box", methods=["POST"])
@@ -93,121 +429,100 @@ def add_box():
     desc = request.form.get("description", "")
     duration = request.form.get("duration", "long-term")
     tags = request.form.getlist("tags")  # Multiple select tags
-    tags_str = ", ".join(tags)
 
-    conn = get_db()
-    c = conn.cursor()
-    c.execute(
-        "INSERT INTO boxes (box_name, description, duration, tags) VALUES (?, ?, ?, ?)",
-        (box_name, desc, duration, tags_str),
-    )
-    box_id = c.lastrowid
-    conn.commit()
-    conn.close()
+    with get_db() as conn:
+        conn.execute("BEGIN")
+        box_id = conn.execute(SQL["add_box"], (box_name, desc, duration)).lastrowid
+        set_box_tags(conn, box_id, tags)
+        conn.execute("COMMIT")
 
-    generate_qr(box_id, request.host.split(":")[0])
+    submit_qr(box_id)
     flash("Box added successfully!", "success")
     return redirect(url_for("list_boxes"))
 
 @app.route("/box/<int:box_id>")
 def view_box(box_id):
     """View a single box and its items"""
-    conn = get_db()
-    c = conn.cursor()
-    c.execute("SELECT * FROM boxes WHERE id=?", (box_id,))
-    box = c.fetchone()
-    c.execute("SELECT * FROM items WHERE box_id=?", (box_id,))
-    items = c.fetchall()
-    conn.close()
+    box, items = load_box(box_id, get_revision())
     return render_template("box.html", box_id=box_id, box=box, items=items)
 
 @app.route("/box/<int:box_id>/add_item", methods=["POST"])
 def add_item(box_id):
     """Add an item to a box"""
-    name = request.form["item_name"]
-    qty = int(request.form["quantity"])
-    notes = request.form.get("notes", "")
-    conn = get_db()
-    conn.execute(
-        "INSERT INTO items (box_id, item_name, quantity, notes) VALUES (?, ?, ?, ?)",
-        (box_id, name, qty, notes),
-    )
-    conn.commit()
-    conn.close()
+    form = parse_item_form()
+    with get_db() as conn:
+        try:
+            conn.execute(SQL["add_item"], (box_id, form.item_name, form.quantity, form.notes))
+        except sqlite3.IntegrityError:
+            abort(404)  # box was deleted, e.g. from another tab
     flash("Item added!", "success")
     return redirect(url_for("view_box", box_id=box_id))
 
 @app.route("/edit_item/<int:item_id>", methods=["GET", "POST"])
 def edit_item(item_id):
     """Edit an existing item"""
-    conn = get_db()
-    c = conn.cursor()
-    if request.method == "POST":
-        name = request.form["item_name"]
-        qty = int(request.form["quantity"])
-        notes = request.form.get("notes", "")
-        c.execute(
-            "UPDATE items SET item_name=?, quantity=?, notes=? WHERE id=?",
-            (name, qty, notes, item_id),
-        )
-        conn.commit()
-        conn.close()
-        box_id = request.form["box_id"]
-        flash("Item updated successfully!", "success")
-        return redirect(url_for("view_box", box_id=box_id))
-    else:
-        c.execute("SELECT id, box_id, item_name, quantity, notes FROM items WHERE id=?", (item_id,))
-        item = c.fetchone()
-        conn.close()
-        return render_template("edit_item.html", item=item)
+    with get_db() as conn:
+        if request.method == "POST":
+            form = parse_item_form()
+            conn.execute(SQL["update_item"], (form.item_name, form.quantity, form.notes, item_id))
+            box_id = request.form["box_id"]
+            flash("Item updated successfully!", "success")
+            return redirect(url_for("view_box", box_id=box_id))
+        else:
+            item = conn.execute(SQL["get_item"], (item_id,)).fetchone()
+    return render_template("edit_item.html", item=item)
 
 @app.route("/delete_item/<int:item_id>/<int:box_id>")
 def delete_item(item_id, box_id):
     """Delete an item"""
-    conn = get_db()
-    conn.execute("DELETE FROM items WHERE id=?", (item_id,))
-    conn.commit()
-    conn.close()
+    with get_db() as conn:
+        conn.execute(SQL["delete_item"], (item_id,))
     flash("Item deleted.", "success")
     return redirect(url_for("view_box", box_id=box_id))
 
 @app.route('/box/<int:box_id>/delete', methods=['POST'])
 def delete_box(box_id):
-    conn = get_db()
-    conn.execute('DELETE FROM boxes WHERE id = ?', (box_id,))
-    conn.execute('DELETE FROM items WHERE box_id = ?', (box_id,))
-    conn.commit()
-    conn.close()
+    with get_db() as conn:
+        # Items go with it via ON DELETE CASCADE
+        conn.execute(SQL["delete_box"], (box_id,))
     flash("Box deleted successfully!", "info")
     return redirect(url_for('list_boxes'))
 
 @app.route("/box/<int:box_id>/edit", methods=["GET", "POST"])
 def edit_box(box_id):
-    conn = get_db()
-    c = conn.cursor()
-    if request.method == "POST":
-        name = request.form["box_name"]
-        desc = request.form.get("description", "")
-        duration = request.form.get("duration", "")
-        tags = request.form.getlist("tags")  # multiple checkboxes → list
-        tags_str = ",".join(tags)
-
-        c.execute(
-            "UPDATE boxes SET box_name=?, description=?, duration=?, tags=? WHERE id=?",
-            (name, desc, duration, tags_str, box_id),
-        )
-        conn.commit()
-        conn.close()
-        flash("Box updated successfully!", "success")
-        return redirect(url_for("view_box", box_id=box_id))
-    else:
-        c.execute("SELECT * FROM boxes WHERE id=?", (box_id,))
-        box = c.fetchone()
-        conn.close()
-        return render_template("edit_box.html", box=box)
+    with get_db() as conn:
+        if request.method == "POST":
+            name = request.form["box_name"]
+            desc = request.form.get("description", "")
+            duration = request.form.get("duration", "")
+            tags = request.form.getlist("tags")  # multiple checkboxes → list
+
+            conn.execute("BEGIN")
+            if conn.execute(SQL["update_box"], (name, desc, duration, box_id)).rowcount == 0:
+                abort(404)  # box was deleted; get_db() rolls the transaction back
+            set_box_tags(conn, box_id, tags)
+            conn.execute("COMMIT")
+            submit_qr(box_id)  # no-op if it exists
+            flash("Box updated successfully!", "success")
+            return redirect(url_for("view_box", box_id=box_id))
+        else:
+            box = conn.execute(SQL["get_box"], (box_id,)).fetchone()
+    return render_template("edit_box.html", box=box)
+
+# --- Startup ---
+# Called once per boot: by gunicorn's on_starting hook, or below for the dev server.
+def setup():
+    """Prepare the QR directory and schema; safe to run on every boot"""
+    os.makedirs(QR_DIR, exist_ok=True)
+    init_db()
+    with get_db() as conn:
+        box_ids = [row.id for row in conn.execute(SQL["box_ids"])]
+    for box_id in box_ids:
+        generate_qr(box_id, QR_HOST)  # only boxes missing a code for QR_HOST
+    close_db_pool()  # don't hand open connections to forked workers
 
 # --- Run ---
+# Development server only; use gunicorn.conf.py for anything else.
 if __name__ == "__main__":
-    if not os.path.exists(DB):
-        init_db()
+    setup()
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,28 @@
+"""
+Gunicorn settings for serving the Storage Box app.
+
+Run with:
+    gunicorn -c gunicorn.conf.py app:app
+
+gevent workers handle many requests per process while others wait on
+SQLite or QR rendering. The gevent worker monkey-patches the standard
+library itself before app.py is imported.
+"""
+
+import os
+import sys
+
+bind = "0.0.0.0:5000"  # QR codes point at port 5000
+worker_class = "gevent"
+workers = 2 * (os.cpu_count() or 1) + 1
+worker_connections = 1000
+
+
+def on_starting(server):
+    """Create/migrate the database once in the master, before any worker forks"""
+    import app
+
+    app.setup()
+    # Drop the module so each worker imports it fresh after gevent patching,
+    # rather than inheriting the master's unpatched locks and thread-locals.
+    del sys.modules["app"]
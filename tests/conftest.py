@@ -0,0 +1,33 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as storage_app  # noqa: E402
+
+
+@pytest.fixture
+def app_module(tmp_path, monkeypatch):
+    """The app module pointed at a scratch database and QR directory"""
+    storage_app.close_db_pool()
+    monkeypatch.setattr(storage_app, "DB", str(tmp_path / "storage.db"))
+    monkeypatch.setattr(storage_app, "QR_DIR", str(tmp_path / "qr"))
+    monkeypatch.setattr(storage_app, "QR_HOST", "testhost")
+    # Render QR codes inline so no background write outlives tmp_path
+    monkeypatch.setattr(
+        storage_app, "submit_qr", lambda box_id: storage_app.generate_qr(box_id, "testhost")
+    )
+    # Caches are keyed on a revision that restarts with every fresh database
+    storage_app.load_box.cache_clear()
+    storage_app._boxes_cache.update(revision=None, boxes=None)
+    yield storage_app
+    storage_app.close_db_pool()
+
+
+@pytest.fixture
+def client(app_module):
+    app_module.setup()
+    app_module.app.testing = True
+    return app_module.app.test_client()
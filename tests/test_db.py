@@ -0,0 +1,91 @@
+import re
+import sqlite3
+
+# Schema as shipped before tags were normalized and items cascaded
+LEGACY_SCHEMA = """
+CREATE TABLE boxes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    box_name TEXT NOT NULL,
+    description TEXT,
+    duration TEXT CHECK(duration IN ('long-term', 'short-term', 'seasonal')),
+    tags TEXT
+);
+CREATE TABLE items (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    box_id INTEGER NOT NULL,
+    item_name TEXT NOT NULL,
+    quantity INTEGER DEFAULT 1,
+    notes TEXT,
+    FOREIGN KEY (box_id) REFERENCES boxes(id)
+);
+INSERT INTO boxes (id, box_name, description, duration, tags)
+    VALUES (1, 'Kitchen stuff', '', 'long-term', 'Kitchen, Tools'),
+           (2, 'Empty', '', 'seasonal', '');
+INSERT INTO items (box_id, item_name, quantity, notes)
+    VALUES (1, 'pan', 1, ''), (3, 'orphan', 1, '');
+"""
+
+
+def make_legacy_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    conn.close()
+
+
+def test_migrates_legacy_schema(app_module):
+    make_legacy_db(app_module.DB)
+    app_module.setup()
+    app_module.setup()  # idempotent
+
+    with app_module.get_db() as conn:
+        columns = [col.name for col in conn.execute("PRAGMA table_info(boxes)")]
+        fks = conn.execute("PRAGMA foreign_key_list(items)").fetchall()
+        boxes = conn.execute(app_module.SQL["list_boxes"]).fetchall()
+        items = conn.execute("SELECT item_name FROM items").fetchall()
+        names = {
+            row.name
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('index', 'trigger')")
+        }
+
+    assert "tags" not in columns
+    assert [fk.on_delete for fk in fks] == ["CASCADE"]
+    assert [(box.id, box.tags) for box in boxes] == [(1, "Kitchen,Tools"), (2, None)]
+    assert [item.item_name for item in items] == ["pan"]  # orphan dropped
+    assert {"idx_items_box_id", "idx_box_tags_tag_id", "bump_revision_items_insert"} <= names
+
+
+def test_delete_box_cascades(client, app_module):
+    client.post("/add_box", data={"box_name": "B", "duration": "seasonal", "tags": ["Misc"]})
+    client.post("/box/1/add_item", data={"item_name": "hammer"})
+    client.post("/box/1/delete")
+
+    with app_module.get_db() as conn:
+        assert conn.execute("SELECT count(*) FROM items").fetchone()[0] == 0
+        assert conn.execute("SELECT count(*) FROM box_tags").fetchone()[0] == 0
+
+
+def test_caches_invalidate_on_write(client):
+    client.post("/add_box", data={"box_name": "Old name", "duration": "seasonal"})
+    assert b"Old name" in client.get("/").data
+    assert b"hammer" not in client.get("/box/1").data
+
+    client.post("/box/1/add_item", data={"item_name": "hammer", "quantity": "2"})
+    assert b"hammer (x2)" in client.get("/box/1").data
+
+    client.post("/box/1/edit", data={"box_name": "New name", "duration": "long-term", "tags": ["Tools"]})
+    assert b"New name" in client.get("/").data
+    page = client.get("/box/1").data
+    assert b"New name" in page and b"Tools" in page
+
+
+def test_items_keep_insertion_order(client):
+    client.post("/add_box", data={"box_name": "B", "duration": "seasonal"})
+    for name in ["zebra", "apple", "mango"]:
+        client.post("/box/1/add_item", data={"item_name": name})
+    page = client.get("/box/1").data
+    assert re.findall(rb"(zebra|apple|mango) \(x", page) == [b"zebra", b"apple", b"mango"]
+
+
+def test_writes_to_missing_box_are_404(client):
+    assert client.post("/box/999/add_item", data={"item_name": "x"}).status_code == 404
+    assert client.post("/box/999/edit", data={"box_name": "x", "duration": "seasonal"}).status_code == 404
@@ -0,0 +1,32 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EXPECTED_ENDPOINTS = {
+    "list_boxes",
+    "add_box",
+    "view_box",
+    "add_item",
+    "edit_item",
+    "delete_item",
+    "delete_box",
+    "edit_box",
+}
+
+
+def test_route_count(app_module):
+    endpoints = [rule.endpoint for rule in app_module.app.url_map.iter_rules()]
+    routes = [endpoint for endpoint in endpoints if endpoint != "static"]
+    assert sorted(routes) == sorted(EXPECTED_ENDPOINTS)
+
+
+def test_import_has_no_side_effects(tmp_path):
+    subprocess.run(
+        [sys.executable, "-c", "import app"],
+        cwd=tmp_path,
+        env={**os.environ, "PYTHONPATH": ROOT},
+        check=True,
+    )
+    assert os.listdir(tmp_path) == []